@@ -0,0 +1,184 @@
+# analyzer/cache.py
+# Persistent on-disk store for computed profiles and rendered charts
+
+import hashlib
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+
+# Bump when analysis output changes so stale artifacts are not served
+ANALYZER_VERSION = "3"
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "smart_csv_analyzer"
+)
+DEFAULT_MAX_MB = 512
+# Reads refresh an artifact's last-access time at most this often, so cache
+# hits on every rerun don't all take the write lock
+ACCESS_REFRESH_SECONDS = 60
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    data_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (data_key, version, name)
+)
+"""
+
+_store = None
+
+
+def content_hash(uploaded_file):
+    """
+    Returns the hex SHA-256 of an uploaded file, hashed in chunks straight
+    from its in-memory buffer so the upload is never copied.
+    """
+    digest = hashlib.sha256()
+    with uploaded_file.getbuffer() as view:
+        for start in range(0, len(view), _HASH_CHUNK_BYTES):
+            digest.update(view[start : start + _HASH_CHUNK_BYTES])
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    SQLite-backed store of analysis artifacts keyed by data key (content
+    hash of the upload plus how it was read), analyzer version and artifact
+    name. The database runs in WAL mode so several worker processes can read
+    while one writes; once the total size exceeds `max_bytes` the least
+    recently used artifacts are evicted. Artifacts of other analyzer versions
+    are left to that eviction, so old and new workers can share the store
+    during a rolling deploy.
+
+    Cache errors never break the app: reads fall back to recomputing and
+    failed writes are skipped.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        if cache_dir is None:
+            cache_dir = os.environ.get("SMART_CSV_CACHE_DIR", DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            try:
+                max_mb = float(os.environ.get("SMART_CSV_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            except ValueError:
+                max_mb = DEFAULT_MAX_MB
+            max_bytes = int(max_mb * 1024 * 1024)
+        self.max_bytes = max_bytes
+        self.path = os.path.join(cache_dir, "artifacts.db")
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with closing(self._connect()) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print("Artifact cache unavailable:", e)
+            self.path = None
+
+    def _connect(self):
+        # Autocommit mode; writes open their own IMMEDIATE transactions
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def get(self, data_key, name):
+        """Returns the stored bytes, or None if the artifact is not cached."""
+        if self.path is None:
+            return None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT value, accessed FROM artifacts "
+                    "WHERE data_key = ? AND version = ? AND name = ?",
+                    (data_key, ANALYZER_VERSION, name),
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] > ACCESS_REFRESH_SECONDS:
+                    conn.execute(
+                        "UPDATE artifacts SET accessed = ? "
+                        "WHERE data_key = ? AND version = ? AND name = ?",
+                        (now, data_key, ANALYZER_VERSION, name),
+                    )
+                return row[0]
+        except sqlite3.Error as e:
+            print("Artifact cache read error:", e)
+            return None
+
+    def put(self, data_key, name, value):
+        """Stores bytes under the key, then evicts down to the size limit."""
+        if self.path is None or len(value) > self.max_bytes:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO artifacts "
+                        "(data_key, version, name, value, size, accessed) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (
+                            data_key,
+                            ANALYZER_VERSION,
+                            name,
+                            sqlite3.Binary(value),
+                            len(value),
+                            time.time(),
+                        ),
+                    )
+                    self._evict(conn)
+                    conn.execute("COMMIT")
+                except sqlite3.Error:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            print("Artifact cache write error:", e)
+
+    def _evict(self, conn):
+        conn.execute(
+            """
+            DELETE FROM artifacts WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid,
+                           SUM(size) OVER (ORDER BY accessed DESC, rowid DESC)
+                               AS running
+                    FROM artifacts
+                )
+                WHERE running > ?
+            )
+            """,
+            (self.max_bytes,),
+        )
+
+    def get_or_compute(self, data_key, name, compute):
+        """
+        Returns a cached Python object, computing and storing it on a miss.
+        Objects are pickled; the store is local to this server and only ever
+        holds artifacts the app wrote itself.
+        """
+        value = self.get(data_key, name)
+        if value is not None:
+            try:
+                return pickle.loads(value)
+            except Exception as e:
+                print("Artifact cache decode error:", e)
+
+        result = compute()
+        self.put(data_key, name, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        return result
+
+
+def get_artifact_store():
+    """Returns the artifact store shared by every session of this worker."""
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
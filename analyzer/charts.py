@@ -1,25 +1,45 @@
-import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 import streamlit as st
 import base64
+import hashlib
 import io
 
+from analyzer.cache import get_artifact_store
+from analyzer.governor import mean_ci, sampled_badge_html, total_ci
+
+# matplotlib.pyplot is imported inside the plotting functions so it is only
+# loaded once a chart actually has to be rendered, not on app start or when
+# the chart is served from the artifact store.
+
 
 COLOR_TEXT = "#333333"
 
 
 def render_chart_with_download(fig, filename="chart.png"):
     """Displays a chart and a styled download button with white background."""
-    # Save the chart to a bytes buffer
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", dpi=300)
-    buf.seek(0)
+    png = _fig_to_png(fig)
 
     # Show the chart
     st.pyplot(fig)
+    _render_download_button(png, filename)
+
+
+def render_png_with_download(png, filename="chart.png"):
+    """Displays an already rendered PNG chart with the same download button."""
+    st.image(png, width="stretch")
+    _render_download_button(png, filename)
+
+
+def _fig_to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=300)
+    return buf.getvalue()
 
-    # Convert buffer to base64 string
-    b64 = base64.b64encode(buf.read()).decode()
+
+def _render_download_button(png, filename):
+    # Convert PNG bytes to base64 string
+    b64 = base64.b64encode(png).decode()
 
     # Styled download button (white background)
     button_html = f"""
@@ -44,16 +64,27 @@ def render_chart_with_download(fig, filename="chart.png"):
     st.markdown(button_html, unsafe_allow_html=True)
 
 
-def plot_histogram(df, column, accent_color):
-    data = df[column].dropna()
-    counts, bins = np.histogram(data, bins=20)
-
+def _histogram_labels(column, sample_info):
     with st.expander(f"Customize '{column}' Distribution Chart"):
         chart_title = st.text_input(
-            f"Title for '{column}' distribution", f"{column} Distribution"
+            f"Title for '{column}' distribution",
+            f"{column} Distribution{_sampled_suffix(sample_info)}",
         )
         x_label = st.text_input(f"X-axis Label for '{column}'", column)
-        y_label = st.text_input(f"Y-axis Label for '{column}'", "Count")
+        y_label = st.text_input(
+            f"Y-axis Label for '{column}'", _count_label(sample_info)
+        )
+    return chart_title, x_label, y_label
+
+
+def _draw_histogram(
+    df, column, accent_color, chart_title, x_label, y_label, sample_info=None
+):
+    import matplotlib.pyplot as plt
+
+    data = df[column].dropna()
+    counts, bins = np.histogram(data, bins=20)
+    counts, errors = _estimated_counts(counts, sample_info)
 
     fig, ax = plt.subplots(figsize=(6, 4))
     bar_width = bins[1] - bins[0]
@@ -69,8 +100,17 @@ def plot_histogram(df, column, accent_color):
             linewidth=0.5,
         )
         ax.add_patch(bar)
+    if errors is not None:
+        ax.errorbar(
+            (bins[:-1] + bins[1:]) / 2,
+            counts,
+            yerr=errors,
+            fmt="none",
+            ecolor=COLOR_TEXT,
+            capsize=2,
+        )
 
-    ylim_max = max(counts) * 1.1 if max(counts) > 0 else 1
+    ylim_max = _count_ylim(counts, errors)
     ax.set_xlim([bins[0], bins[-1]])
     ax.set_ylim(0, ylim_max)
     _style_axes(ax, x_label, y_label, chart_title)
@@ -78,21 +118,40 @@ def plot_histogram(df, column, accent_color):
     return fig
 
 
-def plot_bar_chart(df, column, accent_color):
-    value_counts = df[column].value_counts().head(10)
-
+def _bar_chart_labels(column, sample_info):
     with st.expander(f"Customize '{column}' Bar Chart"):
         chart_title = st.text_input(
-            f"Title for '{column}' categories", f"{column} Top 10 Categories"
+            f"Title for '{column}' categories",
+            f"{column} Top 10 Categories{_sampled_suffix(sample_info)}",
         )
         x_label = st.text_input(f"X-axis Label for '{column}'", column)
-        y_label = st.text_input(f"Y-axis Label for '{column}'", "Count")
+        y_label = st.text_input(
+            f"Y-axis Label for '{column}'", _count_label(sample_info)
+        )
+    return chart_title, x_label, y_label
+
+
+def _draw_bar_chart(
+    df, column, accent_color, chart_title, x_label, y_label, sample_info=None
+):
+    import matplotlib.pyplot as plt
+
+    value_counts = df[column].value_counts().head(10)
+    counts, errors = _estimated_counts(value_counts.to_numpy(), sample_info)
+    value_counts = pd.Series(counts, index=value_counts.index)
 
     fig, ax = plt.subplots(figsize=(6, 4))
-    value_counts.plot(kind="bar", ax=ax, color=accent_color, edgecolor="white")
+    value_counts.plot(
+        kind="bar",
+        ax=ax,
+        yerr=errors,
+        color=accent_color,
+        edgecolor="white",
+        ecolor=COLOR_TEXT,
+        capsize=2,
+    )
 
-    ylim_max = value_counts.max() * 1.1 if value_counts.max() > 0 else 1
-    ax.set_ylim(0, ylim_max)
+    ax.set_ylim(0, _count_ylim(counts, errors))
 
     _style_axes(ax, x_label, y_label, chart_title)
     ax.tick_params(axis="x", labelrotation=45)
@@ -100,34 +159,50 @@ def plot_bar_chart(df, column, accent_color):
     return fig
 
 
-def show_numeric_charts(df, accent_color):
-    numeric_cols = df.select_dtypes(include="number").columns
+def show_numeric_charts(table, accent_color, sample_info=None, data_key=None):
+    numeric_cols = table.empty_frame().select_dtypes(include="number").columns
     selected_cols = st.multiselect(
         "Select numeric columns to display:", list(numeric_cols), key="num_cols"
     )
 
     if selected_cols:
+        if sample_info:
+            st.markdown(sampled_badge_html(sample_info), unsafe_allow_html=True)
         cols = st.columns(2)
         for i, col in enumerate(selected_cols):
             with cols[i % 2]:
-                fig = plot_histogram(df, col, accent_color)
-                render_chart_with_download(fig, filename=f"{col}_distribution.png")
-                plt.close(fig)
-
-
-def show_text_charts(df, accent_color):
-    text_cols = df.select_dtypes(exclude="number").columns
+                labels = _histogram_labels(col, sample_info)
+                png = _cached_chart_png(
+                    data_key,
+                    ("histogram", col, accent_color, *labels),
+                    lambda: _draw_histogram(
+                        table.load([col]), col, accent_color, *labels, sample_info
+                    ),
+                )
+                render_png_with_download(png, filename=f"{col}_distribution.png")
+
+
+def show_text_charts(table, accent_color, sample_info=None, data_key=None):
+    text_cols = table.empty_frame().select_dtypes(exclude="number").columns
     selected_cols = st.multiselect(
         "Select categorical columns to display:", list(text_cols), key="cat_cols"
     )
 
     if selected_cols:
+        if sample_info:
+            st.markdown(sampled_badge_html(sample_info), unsafe_allow_html=True)
         cols = st.columns(2)
         for i, col in enumerate(selected_cols):
             with cols[i % 2]:
-                fig = plot_bar_chart(df, col, accent_color)
-                render_chart_with_download(fig, filename=f"{col}_categories.png")
-                plt.close(fig)
+                labels = _bar_chart_labels(col, sample_info)
+                png = _cached_chart_png(
+                    data_key,
+                    ("bar_chart", col, accent_color, *labels),
+                    lambda: _draw_bar_chart(
+                        table.load([col]), col, accent_color, *labels, sample_info
+                    ),
+                )
+                render_png_with_download(png, filename=f"{col}_categories.png")
 
 
 def generate_custom_chart(
@@ -146,7 +221,11 @@ def generate_custom_chart(
     agg_method="None",
     horizontal_bar=False,
     threshold_label=None,
+    sample_info=None,
 ):
+    import matplotlib.pyplot as plt
+
+    title = f"{title}{_sampled_suffix(sample_info)}"
     fig, ax = plt.subplots(figsize=(6, 4))
 
     if chart_type == "Bar":
@@ -159,13 +238,26 @@ def generate_custom_chart(
             return None
         y_col_final = df_grouped.columns[1]  # Aggregated column
 
+        # Sampled results get 95% confidence intervals as error bars; sums
+        # and counts are scaled up to estimated totals of the full upload
+        errors = None
+        if sample_info and agg_method == "Mean":
+            errors = _group_mean_ci(df, x_col, y_col, sample_info)
+        elif sample_info:
+            df_grouped[y_col_final], errors = _group_totals(
+                df, x_col, y_col, agg_method, sample_info
+            )
+
         y_max = df_grouped[y_col_final].max()
         y_max = y_max if y_max > 0 else 1
+        if errors is not None and np.isfinite(errors).any():
+            y_max += np.nanmax(errors)
 
         if horizontal_bar:
             ax.barh(
                 df_grouped[x_col],
                 df_grouped[y_col_final],
+                xerr=errors,
                 color=accent_color,
                 edgecolor="white",
             )
@@ -175,6 +267,7 @@ def generate_custom_chart(
             ax.bar(
                 df_grouped[x_col],
                 df_grouped[y_col_final],
+                yerr=errors,
                 color=accent_color,
                 edgecolor="white",
             )
@@ -200,6 +293,16 @@ def generate_custom_chart(
             ax.plot(
                 df_grouped[x_col], df_grouped[y_col], color=accent_color, linewidth=2
             )
+            if sample_info:
+                errors = _group_mean_ci(df, x_col, y_col, sample_info)
+                ax.fill_between(
+                    df_grouped[x_col],
+                    df_grouped[y_col] - errors,
+                    df_grouped[y_col] + errors,
+                    color=accent_color,
+                    alpha=0.25,
+                    linewidth=0,
+                )
         else:
             ax.scatter(
                 df_grouped[x_col],
@@ -246,6 +349,77 @@ def _style_axes(ax, x_label, y_label, title=None):
     ax.set_facecolor("white")
 
 
+def _cached_chart_png(data_key, chart_params, make_fig):
+    """
+    Returns the PNG for a chart from the artifact store, rendering and storing
+    it on a miss. Without a `data_key` the chart is always rendered.
+    """
+    name = "chart:" + hashlib.sha256(repr(chart_params).encode()).hexdigest()
+    if data_key is not None:
+        png = get_artifact_store().get(data_key, name)
+        if png is not None:
+            return png
+
+    import matplotlib.pyplot as plt
+
+    fig = make_fig()
+    png = _fig_to_png(fig)
+    plt.close(fig)
+    if data_key is not None:
+        get_artifact_store().put(data_key, name, png)
+    return png
+
+
+def _sampled_suffix(sample_info):
+    return " (sampled)" if sample_info else ""
+
+
+def _group_mean_ci(df, x_col, y_col, sample_info):
+    """95% CI half-widths of the per-group means, in groupby order."""
+    return (
+        df.groupby(x_col)[y_col]
+        .agg(lambda s: mean_ci(s.dropna(), sample_info))
+        .to_numpy(dtype=float)
+    )
+
+
+def _group_totals(df, x_col, y_col, method, sample_info):
+    """
+    Estimated full-upload sums (or counts, for "Count") of `y_col` per group
+    and their 95% CI half-widths, in groupby order.
+    """
+    if method == "Count":
+        values = df[y_col].notna().astype(float)
+    else:
+        values = df[y_col].fillna(0).astype(float)
+    sums = values.groupby(df[x_col]).sum().to_numpy()
+    sums_sq = (values**2).groupby(df[x_col]).sum().to_numpy()
+    return sums / sample_info.fraction, total_ci(sums, sums_sq, sample_info)
+
+
+def _estimated_counts(counts, sample_info):
+    """
+    Scales counts over the sample up to estimated counts of the full upload
+    and returns them with 95% CI half-widths. Unsampled counts are returned
+    as they are, without errors.
+    """
+    if not sample_info:
+        return counts, None
+    counts = np.asarray(counts, dtype=float)
+    return counts / sample_info.fraction, total_ci(counts, counts, sample_info)
+
+
+def _count_label(sample_info):
+    return "Estimated count" if sample_info else "Count"
+
+
+def _count_ylim(counts, errors):
+    top = max(counts, default=0)
+    if errors is not None and np.isfinite(errors).any():
+        top += np.nanmax(errors)
+    return top * 1.1 if top > 0 else 1
+
+
 def _aggregate_data(df, x_col, y_col, method):
     try:
         if method == "Mean":
@@ -265,9 +439,12 @@ def _aggregate_data(df, x_col, y_col, method):
 
 # EXPORT
 # For export only – no Streamlit widgets
-def plot_histogram_export(df, column, accent_color):
+def plot_histogram_export(df, column, accent_color, sample_info=None):
+    import matplotlib.pyplot as plt
+
     data = df[column].dropna()
     counts, bins = np.histogram(data, bins=20)
+    counts, errors = _estimated_counts(counts, sample_info)
 
     fig, ax = plt.subplots(figsize=(6, 4))
     bar_width = bins[1] - bins[0]
@@ -283,25 +460,46 @@ def plot_histogram_export(df, column, accent_color):
             linewidth=0.5,
         )
         ax.add_patch(bar)
+    if errors is not None:
+        ax.errorbar(
+            (bins[:-1] + bins[1:]) / 2,
+            counts,
+            yerr=errors,
+            fmt="none",
+            ecolor=COLOR_TEXT,
+            capsize=2,
+        )
 
     ax.set_xlim([bins[0], bins[-1]])
-    ax.set_ylim(0, max(counts) * 1.1 if max(counts) > 0 else 1)
-    ax.set_title(f"{column} Distribution")
+    ax.set_ylim(0, _count_ylim(counts, errors))
+    ax.set_title(f"{column} Distribution{_sampled_suffix(sample_info)}")
     ax.set_xlabel(column)
-    ax.set_ylabel("Count")
+    ax.set_ylabel(_count_label(sample_info))
     fig.tight_layout()
     return fig
 
 
-def plot_bar_chart_export(df, column, accent_color):
+def plot_bar_chart_export(df, column, accent_color, sample_info=None):
+    import matplotlib.pyplot as plt
+
     value_counts = df[column].value_counts().head(10)
+    counts, errors = _estimated_counts(value_counts.to_numpy(), sample_info)
+    value_counts = pd.Series(counts, index=value_counts.index)
     fig, ax = plt.subplots(figsize=(6, 4))
-    value_counts.plot(kind="bar", ax=ax, color=accent_color, edgecolor="white")
+    value_counts.plot(
+        kind="bar",
+        ax=ax,
+        yerr=errors,
+        color=accent_color,
+        edgecolor="white",
+        ecolor=COLOR_TEXT,
+        capsize=2,
+    )
 
-    ax.set_title(f"{column} Top 10 Categories")
+    ax.set_title(f"{column} Top 10 Categories{_sampled_suffix(sample_info)}")
     ax.set_xlabel(column)
-    ax.set_ylabel("Count")
+    ax.set_ylabel(_count_label(sample_info))
     ax.tick_params(axis="x", labelrotation=45)
-    ax.set_ylim(0, value_counts.max() * 1.1 if value_counts.max() > 0 else 1)
+    ax.set_ylim(0, _count_ylim(counts, errors))
     fig.tight_layout()
     return fig
@@ -0,0 +1,224 @@
+# analyzer/columnar.py
+# Arrow IPC copies of uploads for memory-mapped, column-projected reads
+
+import glob
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from analyzer.cache import DEFAULT_CACHE_DIR
+from analyzer.governor import SampleInfo
+
+# Total size of converted uploads kept on disk, overridable with
+# SMART_CSV_COLUMNAR_MAX_MB
+DEFAULT_COLUMNAR_MAX_MB = 2048
+
+_SAMPLE_ROWS_KEY = b"smart_csv.sample_rows"
+_TOTAL_ROWS_KEY = b"smart_csv.total_rows"
+_SAMPLE_RANDOM_KEY = b"smart_csv.sample_random"
+
+
+class ColumnarTable:
+    """
+    An upload converted once to an uncompressed Arrow IPC file. The file is
+    memory-mapped, so loading a few columns only touches their pages and
+    every session reading the same upload shares them through the OS page
+    cache instead of holding its own copy.
+    """
+
+    def __init__(self, path):
+        import pyarrow as pa
+
+        self.path = path
+        self._table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+        metadata = self._table.schema.metadata or {}
+        pandas_metadata = self._table.schema.pandas_metadata or {}
+        self._index_fields = [
+            name
+            for name in pandas_metadata.get("index_columns", [])
+            if isinstance(name, str)
+        ]
+        self._empty = self._table.schema.empty_table().to_pandas()
+        data_fields = [
+            name
+            for name in self._table.column_names
+            if name not in self._index_fields
+        ]
+        self._fields = dict(zip(self._empty.columns, data_fields))
+
+        self.sample_info = None
+        if _SAMPLE_ROWS_KEY in metadata:
+            self.sample_info = SampleInfo(
+                sample_rows=int(metadata[_SAMPLE_ROWS_KEY]),
+                total_rows=int(metadata[_TOTAL_ROWS_KEY]),
+                random_sample=metadata.get(_SAMPLE_RANDOM_KEY, b"1") == b"1",
+            )
+
+    @property
+    def num_rows(self):
+        return self._table.num_rows
+
+    @property
+    def columns(self):
+        return list(self._empty.columns)
+
+    def empty_frame(self):
+        """Returns a zero-row DataFrame with the table's columns and dtypes."""
+        return self._empty
+
+    def null_counts(self):
+        """Missing values per column, read from Arrow metadata without a scan."""
+        counts = [self._table.column(f).null_count for f in self._fields.values()]
+        return pd.Series(counts, index=self._empty.columns)
+
+    def load(self, columns=None):
+        """Loads the table, or only `columns` of it, as a DataFrame."""
+        return self._project(self._table, columns).to_pandas()
+
+    def take(self, row_ids, columns=None):
+        """Loads only the given positional rows as a DataFrame."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        df = self._project(self._table, columns).take(row_ids).to_pandas()
+        if not self._index_fields:
+            # A RangeIndex isn't stored as a column; label rows by position
+            df.index = pd.Index(row_ids)
+        return df
+
+    def _project(self, table, columns):
+        if columns is None:
+            return table
+        fields = [self._fields[col] for col in dict.fromkeys(columns)]
+        return table.select(fields + self._index_fields)
+
+
+class FrameTable:
+    """
+    Same interface as ColumnarTable over an in-memory DataFrame, used when an
+    upload can't be converted to Arrow (e.g. mixed-type object columns).
+    """
+
+    def __init__(self, df, sample_info=None):
+        self._df = df
+        self.sample_info = sample_info
+
+    @property
+    def num_rows(self):
+        return len(self._df)
+
+    @property
+    def columns(self):
+        return list(self._df.columns)
+
+    def empty_frame(self):
+        return self._df.iloc[:0]
+
+    def null_counts(self):
+        return self._df.isnull().sum()
+
+    def load(self, columns=None):
+        if columns is None:
+            return self._df
+        return self._df[list(dict.fromkeys(columns))]
+
+    def take(self, row_ids, columns=None):
+        return self.load(columns).iloc[row_ids]
+
+
+def _columnar_dir():
+    cache_dir = os.environ.get("SMART_CSV_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return os.path.join(cache_dir, "columnar")
+
+
+def _columnar_path(read_key):
+    name = hashlib.sha256(read_key.encode()).hexdigest()
+    return os.path.join(_columnar_dir(), f"{name}.arrow")
+
+
+def open_columnar(read_key):
+    """Returns the converted upload for `read_key`, or None if there is none."""
+    import pyarrow as pa
+
+    path = _columnar_path(read_key)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = ColumnarTable(path)
+        os.utime(path)  # marks the file as recently used for eviction
+        return table
+    except (OSError, pa.ArrowException) as e:
+        print("Columnar read error:", e)
+        return None
+
+
+def write_columnar(df, read_key, sample_info=None):
+    """
+    Converts a parsed upload to Arrow IPC once and returns it as a
+    ColumnarTable. Falls back to a FrameTable if the conversion fails.
+    """
+    import pyarrow as pa
+
+    path = _columnar_path(read_key)
+    tmp_path = None
+    try:
+        table = pa.Table.from_pandas(df)
+        if sample_info is not None:
+            metadata = dict(table.schema.metadata or {})
+            metadata[_SAMPLE_ROWS_KEY] = str(sample_info.sample_rows).encode()
+            metadata[_TOTAL_ROWS_KEY] = str(sample_info.total_rows).encode()
+            metadata[_SAMPLE_RANDOM_KEY] = b"1" if sample_info.random_sample else b"0"
+            table = table.replace_schema_metadata(metadata)
+
+        # Write to a temporary file and rename it into place, so concurrent
+        # workers never map a half-written file
+        os.makedirs(_columnar_dir(), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=_columnar_dir(), suffix=".tmp")
+        os.close(fd)
+        os.chmod(tmp_path, 0o644)
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        tmp_path = None
+        _evict(keep=path)
+        return ColumnarTable(path)
+    except (OSError, ValueError, TypeError, pa.ArrowException) as e:
+        print("Columnar conversion failed:", e)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return FrameTable(df, sample_info)
+
+
+def _evict(keep):
+    """Removes the least recently used conversions above the size limit."""
+    try:
+        max_mb = float(
+            os.environ.get("SMART_CSV_COLUMNAR_MAX_MB", DEFAULT_COLUMNAR_MAX_MB)
+        )
+    except ValueError:
+        max_mb = DEFAULT_COLUMNAR_MAX_MB
+    max_bytes = max_mb * 1024 * 1024
+
+    files = []
+    for path in glob.glob(os.path.join(_columnar_dir(), "*.arrow")):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            # Sessions that already mapped the file keep their pages
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
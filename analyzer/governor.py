@@ -0,0 +1,260 @@
+# analyzer/governor.py
+# Memory budget checks and sampled-analysis mode for large uploads
+
+import math
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Per-session memory budget, overridable with SMART_CSV_MEMORY_BUDGET_MB
+DEFAULT_BUDGET_MB = 512
+
+# Rough in-memory size of a parsed file relative to its size on disk
+CSV_EXPANSION = 4
+EXCEL_EXPANSION = 12
+
+# A full run is only offered if it fits in this share of free memory
+FULL_RUN_HEADROOM = 0.5
+
+# Container memory accounting: cgroup v2, then v1 (limit, usage, stats file
+# and its key for inactive page cache)
+_CGROUP_MEMORY_FILES = [
+    (
+        "/sys/fs/cgroup/memory.max",
+        "/sys/fs/cgroup/memory.current",
+        "/sys/fs/cgroup/memory.stat",
+        "inactive_file",
+    ),
+    (
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+        "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+        "/sys/fs/cgroup/memory/memory.stat",
+        "total_inactive_file",
+    ),
+]
+# cgroup v1 reports "no limit" as a value near 2**63
+_CGROUP_UNLIMITED = 2**60
+
+MIN_SAMPLE_ROWS = 1_000
+# Rows parsed at a time when sampling a CSV
+CSV_CHUNK_ROWS = 50_000
+Z_95 = 1.96
+
+
+@dataclass
+class SampleInfo:
+    """How the analysed sample relates to the full upload."""
+
+    sample_rows: int
+    total_rows: int
+    # False when only the leading rows were read (oversized Excel sheets)
+    random_sample: bool = True
+
+    @property
+    def fraction(self):
+        return self.sample_rows / self.total_rows if self.total_rows else 1.0
+
+
+def get_budget_bytes():
+    """Returns the per-session memory budget in bytes."""
+    budget_mb = os.environ.get("SMART_CSV_MEMORY_BUDGET_MB", DEFAULT_BUDGET_MB)
+    try:
+        budget_mb = float(budget_mb)
+    except ValueError:
+        budget_mb = DEFAULT_BUDGET_MB
+    return int(budget_mb * 1024 * 1024)
+
+
+def estimate_upload_bytes(uploaded_file):
+    """Estimates the in-memory size of an upload before it is parsed."""
+    if uploaded_file.name.endswith(".csv"):
+        expansion = CSV_EXPANSION
+    else:
+        expansion = EXCEL_EXPANSION
+    return uploaded_file.size * expansion
+
+
+def frame_bytes(df):
+    """Returns the actual in-memory size of a parsed DataFrame."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def available_memory_bytes():
+    """
+    Returns free memory for this worker, or None if it is unknown. In a
+    container the cgroup memory limit applies; the host's free memory is
+    only used on its own when no limit is set.
+    """
+    known = [
+        free
+        for free in (_cgroup_available_bytes(), _host_available_bytes())
+        if free is not None
+    ]
+    return min(known) if known else None
+
+
+def _cgroup_available_bytes():
+    """Headroom under the cgroup memory limit, or None without a limit."""
+    for limit_path, usage_path, stat_path, inactive_key in _CGROUP_MEMORY_FILES:
+        try:
+            with open(limit_path) as f:
+                limit = f.read().strip()
+            with open(usage_path) as f:
+                usage = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if limit == "max" or int(limit) >= _CGROUP_UNLIMITED:
+            return None
+        # Usage includes page cache the kernel reclaims before hitting the
+        # limit (e.g. memory-mapped Arrow files), so inactive file pages
+        # count as available
+        try:
+            with open(stat_path) as f:
+                for line in f:
+                    key, value = line.split()
+                    if key == inactive_key:
+                        usage -= int(value)
+                        break
+        except (OSError, ValueError):
+            pass
+        return max(int(limit) - usage, 0)
+    return None
+
+
+def _host_available_bytes():
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def can_run_full(estimated_bytes):
+    """Checks whether a full, unsampled run fits in the memory that is free."""
+    available = available_memory_bytes()
+    return available is None or estimated_bytes < available * FULL_RUN_HEADROOM
+
+
+def read_csv_sampled(uploaded_file, fraction, seed=0):
+    """
+    Parses a uniform random sample of roughly `fraction` of the CSV rows,
+    one chunk at a time so only the sample is kept. Returns the sample and
+    the total row count, which counts parsed records only (blank lines and
+    quoted line breaks don't add rows).
+    """
+    rng = np.random.default_rng(seed)
+    total_rows = 0
+    samples = []
+    for chunk in pd.read_csv(uploaded_file, chunksize=CSV_CHUNK_ROWS):
+        total_rows += len(chunk)
+        samples.append(chunk[rng.random(len(chunk)) < fraction])
+    return pd.concat(samples, ignore_index=True), total_rows
+
+
+def excel_sheet_rows(excel_file, sheet_name):
+    """
+    Returns the number of data rows in a sheet from the size stored in the
+    workbook, without reading its cells, or None if the size isn't stored.
+    """
+    try:
+        book = excel_file.book
+        if hasattr(book, "sheet_by_name"):  # xlrd (.xls)
+            max_row = book.sheet_by_name(sheet_name).nrows
+        else:  # openpyxl (.xlsx), read from the sheet's dimension tag
+            max_row = book[sheet_name].max_row
+    except Exception:
+        return None
+    return None if max_row is None else max(max_row - 1, 0)
+
+
+def read_excel_capped(excel_file, sheet_name, fraction):
+    """
+    Parses only the leading rows of an oversized sheet, about `fraction` of
+    it, so the rest never reaches memory. Returns the rows and the sheet's
+    row count, or (None, None) when the workbook doesn't record its size.
+    """
+    total_rows = excel_sheet_rows(excel_file, sheet_name)
+    if total_rows is None:
+        return None, None
+    nrows = max(MIN_SAMPLE_ROWS, int(total_rows * fraction))
+    return excel_file.parse(sheet_name, nrows=nrows), total_rows
+
+
+def apply_budget(df, budget_bytes, total_rows=None, random_sample=True):
+    """
+    Samples `df` down to the memory budget after parsing. `total_rows` is the
+    row count of the full upload when `df` is already a pre-parse sample, and
+    `random_sample` is False if that sample is the upload's leading rows.
+    Returns the frame to analyse and a SampleInfo, or None for a full run.
+    """
+    total_rows = max(total_rows or 0, len(df))
+    size = frame_bytes(df)
+    if size > budget_bytes and len(df) > MIN_SAMPLE_ROWS:
+        keep = max(MIN_SAMPLE_ROWS, int(len(df) * budget_bytes / size))
+        df = df.sample(n=keep, random_state=0).sort_index()
+
+    if len(df) >= total_rows:
+        return df, None
+    return df, SampleInfo(len(df), total_rows, random_sample)
+
+
+def _finite_population_correction(sample_info):
+    n, N = sample_info.sample_rows, sample_info.total_rows
+    return math.sqrt((N - n) / (N - 1)) if N > 1 else 0.0
+
+
+def mean_ci(data, sample_info):
+    """Half-width of the 95% confidence interval for the mean of `data`."""
+    n = len(data)
+    if n < 2:
+        return float("nan")
+    return Z_95 * data.std() / math.sqrt(n) * _finite_population_correction(
+        sample_info
+    )
+
+
+def total_ci(sums, sums_sq, sample_info):
+    """
+    Half-width of the 95% confidence interval for the total over the full
+    upload of a per-row value (0 for rows outside a group), given its sum and
+    sum of squares over the sample. Works elementwise on arrays.
+    """
+    n = sample_info.sample_rows
+    if n < 2:
+        return np.full(np.shape(sums), np.nan)
+    mean = np.asarray(sums, dtype=float) / n
+    var = np.maximum((np.asarray(sums_sq, dtype=float) - n * mean**2) / (n - 1), 0)
+    return (
+        Z_95
+        * np.sqrt(var / n)
+        * _finite_population_correction(sample_info)
+        * sample_info.total_rows
+    )
+
+
+def proportion_ci(share, n, sample_info):
+    """Half-width of the 95% confidence interval for a share between 0 and 1."""
+    if n < 1:
+        return float("nan")
+    return Z_95 * math.sqrt(
+        share * (1 - share) / n
+    ) * _finite_population_correction(sample_info)
+
+
+def sampled_badge_html(sample_info):
+    """Returns the 'sampled' badge shown next to sampled results."""
+    return (
+        "<span style='background-color:#FFF3CD; color:#8A6D3B; "
+        "border:1px solid #FFE08A; border-radius:6px; padding:2px 8px; "
+        "font-size:13px; font-weight:600;'>"
+        f"SAMPLED · {sample_info.sample_rows:,} of {sample_info.total_rows:,} rows "
+        f"({sample_info.fraction * 100:.1f}%)</span>"
+    )
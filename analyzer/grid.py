@@ -0,0 +1,184 @@
+# analyzer/grid.py
+# Server-paged table component for previews and result tables
+
+import math
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analyzer.columnar import FrameTable
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_COLUMNS = 20
+NO_SORT = "(none)"
+# Session state suffixes of one table's controls and cached row order
+_STATE_NAMES = [
+    "page",
+    "col_page",
+    "sort",
+    "order",
+    "filter_col",
+    "filter_text",
+    "row_order",
+]
+
+
+def show_paged_table(
+    source,
+    key,
+    data_key=None,
+    page_size=DEFAULT_PAGE_SIZE,
+    max_columns=DEFAULT_MAX_COLUMNS,
+    style=None,
+):
+    """
+    Shows `source` (a DataFrame or a table from analyzer.columnar) one page
+    at a time. Only the visible window of rows and columns is loaded, styled
+    and sent to the browser, so payload and render time depend on the
+    viewport rather than on the table size.
+
+    Sort and filter run on the server over the cached data; the resulting
+    row order is kept in the session so paging through it is instant.
+    `data_key` identifies the data behind `source` for that cache, and
+    `style` optionally turns the visible window into a pandas Styler.
+    Paging, sort and filter start over when `data_key` changes.
+    """
+    table = FrameTable(source) if isinstance(source, pd.DataFrame) else source
+    columns = table.columns
+
+    reset_widget_state(key, data_key, [f"{key}_{name}" for name in _STATE_NAMES])
+
+    sort_col, ascending, filter_col, filter_text = _table_controls(columns, key)
+    row_ids = _row_order(
+        table, key, data_key, sort_col, ascending, filter_col, filter_text
+    )
+    n_rows = table.num_rows if row_ids is None else len(row_ids)
+
+    # Row and column windows; stored pages are clamped before the widgets are
+    # created so a narrower filter can't leave them out of range
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    n_col_pages = max(1, math.ceil(len(columns) / max_columns))
+    for page_key, last_page in [
+        (f"{key}_page", n_pages),
+        (f"{key}_col_page", n_col_pages),
+    ]:
+        if st.session_state.get(page_key, 1) > last_page:
+            st.session_state[page_key] = last_page
+
+    nav_cols = st.columns(2)
+    with nav_cols[0]:
+        page = st.number_input(
+            f"Page (of {n_pages:,})",
+            min_value=1,
+            max_value=n_pages,
+            key=f"{key}_page",
+        )
+    col_page = 1
+    if n_col_pages > 1:
+        with nav_cols[1]:
+            col_page = st.number_input(
+                f"Column page (of {n_col_pages:,})",
+                min_value=1,
+                max_value=n_col_pages,
+                key=f"{key}_col_page",
+            )
+
+    row_start = (page - 1) * page_size
+    row_stop = min(row_start + page_size, n_rows)
+    col_start = (col_page - 1) * max_columns
+    col_stop = min(col_start + max_columns, len(columns))
+
+    if row_ids is None:
+        window_ids = np.arange(row_start, row_stop)
+    else:
+        window_ids = row_ids[row_start:row_stop]
+    window = table.take(window_ids, columns[col_start:col_stop])
+
+    st.dataframe(window if style is None else style(window), width="stretch")
+    st.caption(
+        f"Rows {row_start + 1 if n_rows else 0:,}–{row_stop:,} of {n_rows:,}"
+        + (
+            f" · Columns {col_start + 1:,}–{col_stop:,} of {len(columns):,}"
+            if n_col_pages > 1
+            else ""
+        )
+    )
+
+
+def reset_widget_state(key, data_key, widget_keys):
+    """
+    Clears the session state of `widget_keys` when `data_key` differs from
+    the one they were last used with, so selections made for one upload
+    don't carry over to the next.
+    """
+    marker = f"{key}_data_key"
+    if st.session_state.get(marker) != data_key:
+        for widget_key in widget_keys:
+            st.session_state.pop(widget_key, None)
+        st.session_state[marker] = data_key
+
+
+def _table_controls(columns, key):
+    with st.expander("Sort & filter"):
+        control_cols = st.columns(4)
+        with control_cols[0]:
+            sort_col = st.selectbox(
+                "Sort by", [NO_SORT] + columns, key=f"{key}_sort"
+            )
+        with control_cols[1]:
+            order = st.selectbox(
+                "Order", ["Ascending", "Descending"], key=f"{key}_order"
+            )
+        with control_cols[2]:
+            filter_col = st.selectbox(
+                "Filter column", columns, key=f"{key}_filter_col"
+            )
+        with control_cols[3]:
+            filter_text = st.text_input("Contains", "", key=f"{key}_filter_text")
+
+    return (
+        None if sort_col == NO_SORT else sort_col,
+        order == "Ascending",
+        filter_col,
+        filter_text.strip(),
+    )
+
+
+def _row_order(table, key, data_key, sort_col, ascending, filter_col, filter_text):
+    """
+    Returns the positional row ids matching the filter in sort order, or None
+    when the table is shown as is. Only the sort and filter columns are
+    loaded, and the last result per table is kept in the session.
+    """
+    if sort_col is None and not filter_text:
+        return None
+
+    cache_key = (data_key, sort_col, ascending, filter_col, filter_text)
+    cached = st.session_state.get(f"{key}_row_order")
+    if cached is not None and data_key is not None and cached[0] == cache_key:
+        return cached[1]
+
+    row_ids = np.arange(table.num_rows)
+    if filter_text:
+        values = table.load([filter_col])[filter_col]
+        mask = values.astype(str).str.contains(
+            filter_text, case=False, regex=False, na=False
+        )
+        row_ids = np.flatnonzero(mask.to_numpy())
+
+    if sort_col is not None:
+        values = table.load([sort_col])[sort_col].iloc[row_ids]
+        values = values.reset_index(drop=True)
+        # Formatted result tables hold numbers as text; sort those numerically
+        if not pd.api.types.is_numeric_dtype(values):
+            numeric = pd.to_numeric(values, errors="coerce")
+            if numeric.notna().sum() == values.notna().sum():
+                values = numeric
+        order = values.sort_values(
+            ascending=ascending, na_position="last", kind="stable"
+        ).index
+        row_ids = row_ids[order.to_numpy()]
+
+    st.session_state[f"{key}_row_order"] = (cache_key, row_ids)
+    return row_ids
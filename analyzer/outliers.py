@@ -0,0 +1,233 @@
+# analyzer/outliers.py
+# Vectorized outlier detection with a compact per-column row index
+
+import warnings
+
+import numpy as np
+import streamlit as st
+
+from analyzer.cache import get_artifact_store
+from analyzer.grid import reset_widget_state, show_paged_table
+
+METHOD_LABELS = {
+    "iqr": "IQR (1.5 × IQR fences)",
+    "mad": "Robust z-score (MAD)",
+}
+METHOD_NAMES = {"iqr": "IQR", "mad": "robust z-score"}
+
+IQR_FACTOR = 1.5
+MAD_Z_THRESHOLD = 3.5
+# Scales the MAD so it matches the standard deviation of normal data
+MAD_SCALE = 1.4826
+
+
+class OutlierIndex:
+    """
+    Outlying rows of every numeric column of a DataFrame, computed in one
+    vectorized pass. Flags are kept as one packed row bitmap per column plus
+    a combined per-row score: the sum, over columns, of how far a value lies
+    beyond its fence in units of the column's spread. Row ids are positional.
+    """
+
+    def __init__(self, df, method="iqr"):
+        if method not in METHOD_LABELS:
+            raise ValueError(f"Unknown outlier method: {method}")
+
+        numeric = df.select_dtypes(include="number")
+        values = numeric.to_numpy(dtype=float, na_value=np.nan)
+        self.method = method
+        self.columns = list(numeric.columns)
+        self.n_rows = len(df)
+
+        if values.size == 0:
+            # No numeric columns or no rows: nothing to flag
+            self.lower = self.upper = np.full(values.shape[1], np.nan)
+            high = low = np.zeros(values.shape, dtype=bool)
+            self.scores = np.zeros(self.n_rows, dtype=np.float32)
+        else:
+            high, low = self._flag(values)
+
+        self.high_counts = dict(zip(self.columns, high.sum(axis=0).tolist()))
+        self.low_counts = dict(zip(self.columns, low.sum(axis=0).tolist()))
+        self.non_null_counts = dict(
+            zip(self.columns, (~np.isnan(values)).sum(axis=0).tolist())
+        )
+        self._bitmaps = {
+            col: np.packbits(high[:, i] | low[:, i])
+            for i, col in enumerate(self.columns)
+        }
+
+    def _flag(self, values):
+        """Sets fences and scores; returns the high and low outlier masks."""
+        method = self.method
+        # All-NaN columns only warn here and end up with NaN fences
+        with warnings.catch_warnings(), np.errstate(invalid="ignore"):
+            warnings.simplefilter("ignore", RuntimeWarning)
+            if method == "iqr":
+                q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+                spread = q3 - q1
+                self.lower = q1 - IQR_FACTOR * spread
+                self.upper = q3 + IQR_FACTOR * spread
+            else:
+                median = np.nanmedian(values, axis=0)
+                spread = np.nanmedian(np.abs(values - median), axis=0) * MAD_SCALE
+                # A zero MAD makes every z-score infinite; flag nothing instead
+                spread = np.where(spread > 0, spread, np.inf)
+                self.lower = median - MAD_Z_THRESHOLD * spread
+                self.upper = median + MAD_Z_THRESHOLD * spread
+
+            high = values > self.upper
+            low = values < self.lower
+            excess = np.where(
+                high, values - self.upper, np.where(low, self.lower - values, 0.0)
+            )
+            scale = np.where((spread > 0) & np.isfinite(spread), spread, 1.0)
+            self.scores = (excess / scale).sum(axis=1).astype(np.float32)
+        return high, low
+
+    @property
+    def method_name(self):
+        return METHOD_NAMES[self.method]
+
+    def count(self, column):
+        return self.high_counts[column] + self.low_counts[column]
+
+    def column_mask(self, column):
+        """Unpacks the row bitmap of one column into a boolean mask."""
+        return np.unpackbits(self._bitmaps[column], count=self.n_rows).astype(bool)
+
+    def row_ids(self, columns=None, min_score=0.0):
+        """
+        Positional ids of rows flagged in any of `columns` (all numeric
+        columns by default) whose combined score is at least `min_score`.
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for col in self.columns if columns is None else columns:
+            mask |= self.column_mask(col)
+        if min_score > 0:
+            mask &= self.scores >= min_score
+        return np.flatnonzero(mask)
+
+
+class OutlierRowsTable:
+    """
+    The flagged rows of a table, highest score first, with their score as an
+    extra first column. Has the same interface as the tables in
+    analyzer.columnar, so it can be paged: rows are only loaded from the
+    underlying table for the window that is requested.
+    """
+
+    score_column = "Outlier score"
+
+    def __init__(self, table, index, row_ids):
+        order = np.argsort(-index.scores[row_ids], kind="stable")
+        self._table = table
+        self._row_ids = row_ids[order]
+        self._scores = np.round(index.scores[self._row_ids].astype(float), 2)
+
+    @property
+    def num_rows(self):
+        return len(self._row_ids)
+
+    @property
+    def columns(self):
+        return [self.score_column] + self._table.columns
+
+    def empty_frame(self):
+        return self.take([])
+
+    def load(self, columns=None):
+        return self.take(np.arange(self.num_rows), columns)
+
+    def take(self, positions, columns=None):
+        positions = np.asarray(positions, dtype=np.int64)
+        columns = self.columns if columns is None else list(columns)
+        data_cols = [col for col in columns if col != self.score_column]
+        rows = self._table.take(self._row_ids[positions], data_cols).copy()
+        if self.score_column in columns:
+            rows.insert(0, self.score_column, self._scores[positions])
+        return rows
+
+
+def get_outlier_index(table, method, data_key):
+    """
+    Returns the OutlierIndex for `table`, built once per upload and method
+    from its numeric columns only. It is kept in the session so later reruns
+    don't rescan the data, and in the artifact store so re-opening the same
+    file doesn't either.
+    """
+    cache = st.session_state.setdefault("outlier_index_cache", {})
+    if cache.get("data_key") != data_key:
+        cache.clear()
+        cache["data_key"] = data_key
+    if method not in cache:
+        cache[method] = get_artifact_store().get_or_compute(
+            data_key,
+            f"outliers:{method}",
+            lambda: OutlierIndex(_load_numeric(table), method),
+        )
+    return cache[method]
+
+
+def _load_numeric(table):
+    numeric_cols = table.empty_frame().select_dtypes(include="number").columns
+    return table.load(list(numeric_cols))
+
+
+def show_outlier_explorer(table, data_key):
+    """Lets users list, filter and export outlying rows from the cached index."""
+    # Column picks and the score filter belong to one upload
+    reset_widget_state(
+        "outlier_explorer",
+        data_key,
+        [f"outlier_cols_{method}" for method in METHOD_LABELS] + ["outlier_min_score"],
+    )
+    method = st.radio(
+        "Detection method",
+        list(METHOD_LABELS),
+        format_func=METHOD_LABELS.get,
+        horizontal=True,
+        key="outlier_method",
+    )
+    index = get_outlier_index(table, method, data_key)
+
+    flagged_cols = [col for col in index.columns if index.count(col) > 0]
+    if not flagged_cols:
+        st.success("✅ No outliers found with this method.")
+        return
+
+    selected_cols = st.multiselect(
+        "Flagged in any of these columns:",
+        flagged_cols,
+        default=flagged_cols,
+        key=f"outlier_cols_{method}",
+    )
+    min_score = st.number_input(
+        "Minimum outlier score",
+        min_value=0.0,
+        value=0.0,
+        step=0.5,
+        key="outlier_min_score",
+        help="Sum over columns of the distance beyond the fence, in units of spread.",
+    )
+
+    row_ids = index.row_ids(selected_cols, min_score)
+    st.caption(f"{len(row_ids):,} of {index.n_rows:,} rows are outlying.")
+    if len(row_ids) == 0:
+        return
+
+    rows = OutlierRowsTable(table, index, row_ids)
+    show_paged_table(
+        rows,
+        key="outlier_rows",
+        data_key=(data_key, method, tuple(selected_cols), min_score),
+    )
+
+    # The CSV holds every flagged row, so it is only built when asked for
+    if st.button("📄 Prepare CSV of outlying rows"):
+        st.download_button(
+            "⬇️ Download outlying rows as CSV",
+            data=rows.load().to_csv(index=False).encode("utf-8"),
+            file_name="outlying_rows.csv",
+            mime="text/csv",
+        )
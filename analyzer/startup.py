@@ -0,0 +1,48 @@
+# analyzer/startup.py
+# Cold-start timing for app workers
+
+import os
+import time
+
+from streamlit.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fallback start time where the process start can't be read from /proc
+_imported_at = time.monotonic()
+
+_cold_start_seconds = None
+
+
+def process_age_seconds():
+    """
+    Returns the seconds since this worker process started, read from
+    /proc on Linux, or since this module was imported elsewhere.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name may contain spaces, so fields are counted
+            # from its closing parenthesis; starttime is field 22
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        return uptime - started
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _imported_at
+
+
+def record_startup():
+    """
+    Logs the time from the start of the worker process until the app is
+    ready for an upload, as "Worker cold start: <seconds>s" at INFO level.
+
+    Only the first script run of a worker process is measured: later reruns
+    find every module already imported and would under-report cold start.
+    Returns the cold-start time in seconds.
+    """
+    global _cold_start_seconds
+    if _cold_start_seconds is None:
+        _cold_start_seconds = process_age_seconds()
+        logger.info("Worker cold start: %.3fs", _cold_start_seconds)
+    return _cold_start_seconds
@@ -1,17 +1,33 @@
 import pandas as pd
 
+from analyzer.governor import mean_ci, proportion_ci, sampled_badge_html
+from analyzer.outliers import OutlierIndex
 
-def generate_summary(df):
+# Half-width of the 95% interval around the mean, e.g. mean ± 0.42
+CI_COLUMN = "95% CI (±)"
+
+
+def _ci_text(half_width):
+    return f" ± {half_width:.1f}" if pd.notnull(half_width) else ""
+
+
+def generate_summary(df, sample_info=None, outlier_index=None):
+    """
+    Builds the Smart Data Insights HTML. With `sample_info`, `df` is a sample
+    of the upload: shares and means get 95% confidence intervals and the
+    block carries a "sampled" badge. Outlier insights come from
+    `outlier_index`, or a fresh IQR index when none is given.
+    """
     n_rows, n_cols = df.shape
     numeric_cols = df.select_dtypes(include="number").columns.tolist()
     text_cols = df.select_dtypes(exclude="number").columns.tolist()
 
     html = """
 <div style='line-height:1.8; font-size:16px;'>
-  <h3>🧠 <b>Smart Data Insights</b></h3>
+  <h3>🧠 <b>Smart Data Insights</b> {}</h3>
 
   <p style='margin-left: 15px;'>
-    📄 <b>Shape:</b> {} rows × {} columns<br>
+    📄 <b>Shape:</b> {} rows × {} columns{}<br>
     🔢 <b>Numeric columns ({}):</b> {}<br>
     🔤 <b>Text columns ({}):</b> {}
   </p>
@@ -19,8 +35,10 @@ def generate_summary(df):
   <h4 style='margin-top:10px;'>📌 Insights:</h4>
   <ul style='margin-left: 30px;'>
 """.format(
-        f"{n_rows:,}",
+        sampled_badge_html(sample_info) if sample_info else "",
+        f"{sample_info.total_rows if sample_info else n_rows:,}",
         n_cols,
+        f" (analysed sample of {n_rows:,} rows)" if sample_info else "",
         len(numeric_cols),
         ", ".join(numeric_cols) or "None",
         len(text_cols),
@@ -33,7 +51,15 @@ def generate_summary(df):
     if not total_missing.empty:
         for col, count in total_missing.items():
             percent = (count / n_rows * 100) if n_rows > 0 else 0
-            html += f"<li><b>{col}</b> has {percent:.1f}% missing values ({count:,} rows).</li>"
+            if sample_info:
+                ci = proportion_ci(count / n_rows, n_rows, sample_info) * 100
+                est = round(count / sample_info.fraction)
+                html += (
+                    f"<li><b>{col}</b> has {percent:.1f}%{_ci_text(ci)} missing "
+                    f"values (~{est:,} rows).</li>"
+                )
+            else:
+                html += f"<li><b>{col}</b> has {percent:.1f}% missing values ({count:,} rows).</li>"
     else:
         html += "<li>No missing values detected.</li>"
 
@@ -52,9 +78,12 @@ def generate_summary(df):
             if skew > 1
             else "left-skewed" if skew < -1 else "fairly symmetrical"
         )
+        mean_text = f"{mean:.1f}"
+        if sample_info:
+            mean_text += _ci_text(mean_ci(col_data, sample_info))
         html += (
             f"<li><b>{col}</b> ranges from {min_val:.1f} to {max_val:.1f}, "
-            f"mean = {mean:.1f}, std = {std:.1f} ({skew_label}).</li>"
+            f"mean = {mean_text}, std = {std:.1f} ({skew_label}).</li>"
         )
 
     # Text insights
@@ -65,45 +94,57 @@ def generate_summary(df):
         top_val = non_null.mode().iloc[0]
         freq = non_null.value_counts().iloc[0]
         percent = (freq / len(non_null)) * 100
+        ci = (
+            proportion_ci(freq / len(non_null), len(non_null), sample_info) * 100
+            if sample_info
+            else None
+        )
         html += (
             f"<li><b>{col}</b>: Most frequent value is <i>'{top_val}'</i> "
-            f"({percent:.1f}% of non-missing records).</li>"
+            f"({percent:.1f}%{_ci_text(ci)} of non-missing records).</li>"
         )
 
     # Outliers
+    if outlier_index is None:
+        outlier_index = OutlierIndex(df, "iqr")
     for col in numeric_cols:
-        col_data = df[col].dropna()
-        if col_data.empty:
+        n_valid = outlier_index.non_null_counts[col]
+        if n_valid == 0:
             continue
-        Q1 = col_data.quantile(0.25)
-        Q3 = col_data.quantile(0.75)
-        IQR = Q3 - Q1
-        lower = Q1 - 1.5 * IQR
-        upper = Q3 + 1.5 * IQR
-        outliers = col_data[(col_data < lower) | (col_data > upper)]
-        count = len(outliers)
-        percent = (count / len(col_data)) * 100
+        count = outlier_index.count(col)
+        percent = (count / n_valid) * 100
+        ci = (
+            proportion_ci(count / n_valid, n_valid, sample_info) * 100
+            if sample_info
+            else None
+        )
 
         if count == 0:
-            html += f"<li><b>{col}</b> has no significant outliers based on the IQR method.</li>"
+            html += (
+                f"<li><b>{col}</b> has no significant outliers based on the "
+                f"{outlier_index.method_name} method.</li>"
+            )
         else:
             direction = []
-            if (col_data > upper).any():
+            if outlier_index.high_counts[col]:
                 direction.append("high")
-            if (col_data < lower).any():
+            if outlier_index.low_counts[col]:
                 direction.append("low")
             dir_text = " and ".join(direction)
             html += (
                 f"<li><b>{col}</b> has {count} outlier{'s' if count > 1 else ''} "
-                f"({percent:.1f}%) on the {dir_text} end of the distribution.</li>"
+                f"({percent:.1f}%{_ci_text(ci)}) on the {dir_text} end of the "
+                f"distribution{' in the sample' if sample_info else ''}.</li>"
             )
 
     html += "</ul></div>"
     return html
 
 
-def render_descriptive_stats(df):
+def render_descriptive_stats(df, sample_info=None):
     desc = df.describe().T.reset_index().rename(columns={"index": "Column"})
+    if sample_info:
+        desc[CI_COLUMN] = [mean_ci(df[col].dropna(), sample_info) for col in df]
     desc = desc.rename(
         columns={
             "count": "Count",
@@ -116,9 +157,11 @@ def render_descriptive_stats(df):
             "std": "Std",
         }
     )
-    desc = desc[
-        ["Column", "Count", "Mean", "Min", "25%", "Median", "75%", "Max", "Std"]
-    ]
+    columns = ["Column", "Count", "Mean", "Min", "25%", "Median", "75%", "Max", "Std"]
+    if sample_info:
+        # Appended last so the PDF report's first six columns stay the same
+        columns.append(CI_COLUMN)
+    desc = desc[columns]
 
     for col in desc.columns[1:]:
         desc[col] = desc[col].apply(
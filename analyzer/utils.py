@@ -3,39 +3,37 @@
 
 import streamlit as st
 import pandas as pd
-from fpdf import FPDF
 from io import BytesIO
-from PIL import Image
-import matplotlib.pyplot as plt
-import tempfile
-from bs4 import BeautifulSoup
 
+from analyzer.grid import show_paged_table
+from analyzer.summary import CI_COLUMN
 
-def show_overview(df):
+
+def show_overview(table, data_key=None):
     """
     Displays high-level overview of the dataset including
-    shape and a preview.
+    shape and a paged preview. Only the visible page is loaded.
     """
     st.subheader("🔍 Dataset Overview")
-    st.write("Shape:", df.shape)
-    st.write(df.sample(min(len(df), 50)))
+    st.write("Shape:", (table.num_rows, len(table.columns)))
+    show_paged_table(table, key="overview", data_key=data_key)
 
 
-def show_column_info(df):
+def show_column_info(table, data_key=None):
     """
     Displays column data types and missing value summary using styled dataframes.
+    Both come from the table's schema and metadata, without loading the data.
     """
     st.subheader("📋 Column Info")
 
     # ----- Data Types -----
     st.markdown("**Data Types:**")
-    types_df = pd.DataFrame(
-        {"Column": df.columns, "Type": df.dtypes.astype(str).values}
-    )
-    st.dataframe(types_df, use_container_width=True)
+    dtypes = table.empty_frame().dtypes
+    types_df = pd.DataFrame({"Column": dtypes.index, "Type": dtypes.astype(str).values})
+    show_paged_table(types_df, key="column_types", data_key=data_key)
 
     # ----- Missing Values -----
-    missing = df.isnull().sum()
+    missing = table.null_counts()
     missing = missing[missing > 0]
 
     if not missing.empty:
@@ -44,21 +42,37 @@ def show_column_info(df):
             {
                 "Column": missing.index,
                 "Missing": missing.values,
-                "%": ((missing / len(df)) * 100).round(1),
+                "%": ((missing / table.num_rows) * 100).round(1),
             }
         ).reset_index(drop=True)
 
-        st.dataframe(
-            missing_df.style.format({"Missing": "{:,.0f}", "%": "{:.1f}"})
+        # Only the visible window is styled
+        show_paged_table(
+            missing_df,
+            key="missing_values",
+            data_key=data_key,
+            style=lambda window: window.style.format(
+                {"Missing": "{:,.0f}", "%": "{:.1f}"}
+            )
             .set_properties(**{"text-align": "right"})
             .set_table_styles([{"selector": "th", "props": [("text-align", "left")]}]),
-            use_container_width=True,
         )
     else:
         st.success("✅ No missing values found.")
 
 
-def export_full_report_to_pdf(df, summary_html, stats_df, chart_figs):
+def export_full_report_to_pdf(
+    table, summary_html, stats_df, chart_figs, sample_info=None
+):
+    # The PDF, imaging and HTML-parsing stacks are only needed here, so they
+    # are imported on first export instead of on app start.
+    import tempfile
+
+    import matplotlib.pyplot as plt
+    from bs4 import BeautifulSoup
+    from fpdf import FPDF
+    from PIL import Image
+
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
@@ -69,8 +83,25 @@ def export_full_report_to_pdf(df, summary_html, stats_df, chart_figs):
 
     # Basic Info
     pdf.set_font("Arial", "", 12)
-    shape_str = f"Rows: {df.shape[0]:,}    Columns: {df.shape[1]:,}"
+    total_rows = sample_info.total_rows if sample_info else table.num_rows
+    shape_str = f"Rows: {total_rows:,}    Columns: {len(table.columns):,}"
     pdf.cell(0, 10, shape_str[:100], ln=True)
+    if sample_info:
+        pdf.set_font("Arial", "B", 10)
+        sampled_str = (
+            f"SAMPLED: {sample_info.sample_rows:,} of {total_rows:,} rows "
+            f"({sample_info.fraction * 100:.1f}%)"
+        )
+        if not sample_info.random_sample:
+            sampled_str += ", the first rows of the sheet"
+        pdf.cell(0, 8, sampled_str, ln=True)
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(
+            0,
+            6,
+            "Statistics and charts are computed on this sample; means and "
+            "shares come with 95% confidence intervals.",
+        )
 
     # Smart Summary Text (plain, no emojis, no lists)
     pdf.set_font("Arial", "", 10)
@@ -89,7 +120,11 @@ def export_full_report_to_pdf(df, summary_html, stats_df, chart_figs):
     pdf.cell(0, 10, "Descriptive Statistics", ln=True)
 
     pdf.set_font("Arial", "", 9)
-    stats_df = stats_df.iloc[:, :6]  # Max 6 columns
+    # Max 6 columns, plus the confidence interval of sampled runs
+    columns = list(stats_df.columns[:6])
+    if CI_COLUMN in stats_df.columns:
+        columns.append(CI_COLUMN)
+    stats_df = stats_df[columns]
     col_width = (pdf.w - 20) / len(stats_df.columns)
 
     # Header
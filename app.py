@@ -3,6 +3,8 @@
 
 import streamlit as st
 import pandas as pd
+from analyzer.cache import content_hash, get_artifact_store
+from analyzer.columnar import open_columnar, write_columnar
 from analyzer.utils import show_overview, show_column_info
 from analyzer.charts import (
     show_numeric_charts,
@@ -13,6 +15,18 @@ from analyzer.charts import (
     plot_histogram_export,
 )
 from analyzer.styling import apply_global_style, get_accent_color
+from analyzer.governor import (
+    apply_budget,
+    can_run_full,
+    estimate_upload_bytes,
+    get_budget_bytes,
+    read_csv_sampled,
+    read_excel_capped,
+    sampled_badge_html,
+)
+from analyzer.grid import show_paged_table
+from analyzer.outliers import get_outlier_index, show_outlier_explorer
+from analyzer.startup import record_startup
 from analyzer.summary import generate_summary, render_descriptive_stats
 
 from analyzer.utils import export_full_report_to_pdf
@@ -32,6 +46,8 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+record_startup()
+
 # --------------------------
 # File Upload + Theme
 # --------------------------
@@ -43,15 +59,85 @@ uploaded_file = st.file_uploader(
 # --------------------------
 # If CSV is uploaded
 # --------------------------
-df = None
+table = None
+sample_info = None
 if uploaded_file is not None:
+    # Uploads above the memory budget are analysed on a sample unless the
+    # user opted into a full run
+    budget_bytes = get_budget_bytes()
+    estimated_bytes = estimate_upload_bytes(uploaded_file)
+    # The upload is hashed once, not on every rerun
+    file_id = getattr(uploaded_file, "file_id", None) or (
+        uploaded_file.name,
+        uploaded_file.size,
+    )
+    cached_hash = st.session_state.get("upload_hash")
+    if cached_hash is None or cached_hash[0] != file_id:
+        cached_hash = (file_id, content_hash(uploaded_file))
+        st.session_state["upload_hash"] = cached_hash
+    file_hash = cached_hash[1]
+    # A full run is granted for one file only; a new upload starts sampled
+    if st.session_state.get("full_run_hash") != file_hash:
+        st.session_state["full_run"] = False
+        st.session_state["full_run_hash"] = file_hash
+    full_run = st.session_state.get("full_run", False)
     try:
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        else:
+        total_rows = None
+        sheet_name = None
+        if not uploaded_file.name.endswith(".csv"):
             excel_file = pd.ExcelFile(uploaded_file)
             sheet_name = st.selectbox("Select a sheet:", excel_file.sheet_names)
-            df = excel_file.parse(sheet_name)
+
+        # Each upload is parsed once and converted to a memory-mapped Arrow
+        # file; reruns and other sessions opening the same file reuse it
+        read_mode = "full" if full_run else budget_bytes
+        read_key = f"{file_hash}:{sheet_name or ''}:{read_mode}"
+        table = open_columnar(read_key)
+        if table is None and full_run and not can_run_full(estimated_bytes):
+            # Free memory may have dropped since the opt-in, so it is checked
+            # again right before the full parse
+            st.warning(
+                "⚠️ Not enough free memory for a full run right now, so the "
+                "sampled analysis is shown instead."
+            )
+            full_run = False
+            st.session_state["full_run"] = False
+            read_key = f"{file_hash}:{sheet_name or ''}:{budget_bytes}"
+            table = open_columnar(read_key)
+        if table is None:
+            if uploaded_file.name.endswith(".csv"):
+                if estimated_bytes > budget_bytes and not full_run:
+                    df, total_rows = read_csv_sampled(
+                        uploaded_file, budget_bytes / estimated_bytes
+                    )
+                else:
+                    df = pd.read_csv(uploaded_file)
+            elif estimated_bytes > budget_bytes and not full_run:
+                # Excel can't be sampled while parsing, so only the leading
+                # rows are read, capped by the row count stored in the sheet
+                df, total_rows = read_excel_capped(
+                    excel_file, sheet_name, budget_bytes / estimated_bytes
+                )
+                if df is None:
+                    st.error(
+                        "❌ This sheet is larger than the memory budget and the "
+                        "workbook doesn't record its size, so it wasn't loaded. "
+                        "Save it as CSV to analyse a random sample."
+                    )
+                    st.stop()
+            else:
+                df = excel_file.parse(sheet_name)
+
+            if not full_run:
+                df, sample_info = apply_budget(
+                    df,
+                    budget_bytes,
+                    total_rows,
+                    random_sample=uploaded_file.name.endswith(".csv"),
+                )
+            table = write_columnar(df, read_key, sample_info)
+            del df
+        sample_info = table.sample_info
 
         st.success("✅ File uploaded successfully!")
 
@@ -59,30 +145,77 @@ if uploaded_file is not None:
         st.error(f"❌ Error reading file: {e}")
         st.stop()
 
-if df is not None:
+    if sample_info is not None or full_run:
+        if sample_info is not None:
+            st.markdown(sampled_badge_html(sample_info), unsafe_allow_html=True)
+            if sample_info.random_sample:
+                st.caption(
+                    "This file exceeds the memory budget, so statistics and charts "
+                    "are computed on a random sample with 95% confidence intervals."
+                )
+            else:
+                st.caption(
+                    "This sheet exceeds the memory budget, so statistics and "
+                    "charts are computed on its first "
+                    f"{sample_info.sample_rows:,} rows only. Confidence intervals "
+                    "assume these rows are representative; save the file as CSV "
+                    "to analyse a random sample instead."
+                )
+        st.checkbox(
+            "Run full analysis on all rows",
+            key="full_run",
+            disabled=not full_run and not can_run_full(estimated_bytes),
+            help="Only available while the server has enough free memory.",
+        )
+
+if table is not None:
+    # Identifies the analysed data so results can be reused on reruns and
+    # persisted across sessions in the artifact store. Views load only the
+    # columns they need from the table, and only on a cache miss.
+    data_key = f"{file_hash}:{sheet_name or ''}:{table.num_rows}"
+    artifacts = get_artifact_store()
+    numeric_cols = list(table.empty_frame().select_dtypes(include="number").columns)
+    outlier_index = get_outlier_index(table, "iqr", data_key)
+    summary_html = artifacts.get_or_compute(
+        data_key,
+        "summary",
+        lambda: generate_summary(table.load(), sample_info, outlier_index),
+    )
+    stats_df = (
+        None
+        if not numeric_cols
+        else artifacts.get_or_compute(
+            data_key,
+            "descriptive_stats",
+            lambda: render_descriptive_stats(table.load(numeric_cols), sample_info),
+        )
+    )
+
     tab1, tab2 = st.tabs(["📊 Overview", "📈 Custom Chart"])
 
     # --- Tab 1: Overview ---
     with tab1:
-        show_overview(df)
-        show_column_info(df)
+        show_overview(table, data_key)
+        show_column_info(table, data_key)
 
-        st.markdown(generate_summary(df), unsafe_allow_html=True)
+        st.markdown(summary_html, unsafe_allow_html=True)
 
         st.markdown("### 📊 Descriptive Stats")
-        numeric_df = df.select_dtypes(include="number")
-        if numeric_df.empty:
+        if stats_df is None:
             st.info("No numeric columns to describe.")
         else:
-            st.dataframe(
-                render_descriptive_stats(numeric_df),
-                use_container_width=True,
-            )
+            show_paged_table(stats_df, key="descriptive_stats", data_key=data_key)
+
+        st.markdown("### 🚨 Outlier Explorer")
+        if outlier_index.columns:
+            show_outlier_explorer(table, data_key)
+        else:
+            st.info("No numeric columns to check for outliers.")
 
         st.markdown("### 📊 Distribution of Numerical Columns")
-        show_numeric_charts(df, accent_color)
+        show_numeric_charts(table, accent_color, sample_info, data_key)
         st.markdown("### 📊 Distribution of Categorical Columns")
-        show_text_charts(df, accent_color)
+        show_text_charts(table, accent_color, sample_info, data_key)
         st.markdown("### 📄 Export Full Report to PDF")
         if st.button("📥 Export Summary + Stats + Charts to PDF"):
             # --- Collect charts the user selected ---
@@ -92,23 +225,32 @@ if df is not None:
             selected_numeric = st.session_state.get("num_cols", [])
             selected_text = st.session_state.get("cat_cols", [])
             for col in selected_numeric:
-                fig = plot_histogram_export(df, col, accent_color)
+                fig = plot_histogram_export(
+                    table.load([col]), col, accent_color, sample_info
+                )
                 chart_figs.append(fig)
 
             for col in selected_text:
-                fig = plot_bar_chart_export(df, col, accent_color)
+                fig = plot_bar_chart_export(
+                    table.load([col]), col, accent_color, sample_info
+                )
                 chart_figs.append(fig)
 
             # Add last custom chart if created
             if "last_custom_chart" in st.session_state:
                 chart_figs.append(st.session_state["last_custom_chart"])
 
-            # Prepare content
-            stats_df = render_descriptive_stats(df.select_dtypes(include="number"))
-            summary_html = generate_summary(df)
+            # Prepare content (summary and stats come from the cached profile)
+            report_stats_df = (
+                stats_df
+                if stats_df is not None
+                else render_descriptive_stats(table.load(numeric_cols), sample_info)
+            )
 
             # Generate PDF
-            pdf_file = export_full_report_to_pdf(df, summary_html, stats_df, chart_figs)
+            pdf_file = export_full_report_to_pdf(
+                table, summary_html, report_stats_df, chart_figs, sample_info
+            )
             st.download_button(
                 "⬇️ Download PDF", data=pdf_file, file_name="smart_csv_report.pdf"
             )
@@ -118,14 +260,14 @@ if df is not None:
         st.markdown("### 🎨 Custom Chart Builder")
 
         chart_type = st.selectbox("Chart Type", ["Line", "Bar", "Scatter"])
-        x_col = st.selectbox("X-axis Column", df.columns)
-        y_col = st.selectbox("Y-axis Column", df.columns)
+        x_col = st.selectbox("X-axis Column", table.columns)
+        y_col = st.selectbox("Y-axis Column", table.columns)
 
         agg_method = "None"
         horizontal_bar = False
 
         if chart_type in ["Bar", "Line"]:
-            if not pd.api.types.is_numeric_dtype(df[y_col]):
+            if not pd.api.types.is_numeric_dtype(table.empty_frame()[y_col]):
                 st.warning("Y column must be numeric for this chart type.")
             else:
                 agg_method = st.selectbox(
@@ -153,8 +295,9 @@ if df is not None:
             threshold_label = st.text_input("Threshold Label (optional)", "")
 
         if st.button("Generate Chart"):
+            # Only the two plotted columns are loaded
             fig = generate_custom_chart(
-                df,
+                table.load([x_col, y_col]),
                 x_col,
                 y_col,
                 chart_type=chart_type,
@@ -169,6 +312,7 @@ if df is not None:
                 agg_method=agg_method,
                 horizontal_bar=horizontal_bar,
                 threshold_label=threshold_label,
+                sample_info=sample_info,
             )
             if fig is not None:
                 render_chart_with_download(